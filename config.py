@@ -6,22 +6,36 @@ load_dotenv()
 
 # API Configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-MODEL_NAME = 'gemini-pro'
+MODEL_NAME = 'gemini-1.5-flash'
 
 # Batch Processing Configuration
-BATCH_SIZE = 10  # Process 10 resumes at a time
+MICRO_BATCH_SIZE = 4  # Resumes analyzed per API request
 MAX_CONCURRENT_REQUESTS = 5  # Maximum concurrent API calls
-RATE_LIMIT_DELAY = 1  # Delay between API calls in seconds
+MIN_CONCURRENT_REQUESTS = 1  # Concurrency floor for adaptive throttling
+TARGET_LATENCY_SECONDS = 15.0  # Mean API latency above which concurrency backs off
+LATENCY_WINDOW = 32  # Number of recent API latencies averaged for throttling
+RATE_LIMIT_DELAY = 1  # Minimum interval between API calls in seconds
+MAX_RETRY_ATTEMPTS = 4  # Attempts per API call on rate-limit or transient errors
+RETRY_BASE_DELAY = 1.0  # Initial backoff delay in seconds
+RETRY_MAX_DELAY = 16.0  # Upper bound on a single backoff delay in seconds
 
 # File Processing Configuration
 SUPPORTED_FORMATS = ['.pdf', '.docx']
+FILE_SIGNATURES = {'.pdf': b'%PDF-', '.docx': b'PK\x03\x04'}  # Leading magic bytes expected per format
 MAX_FILE_SIZE_MB = 10
-TEMP_DIR = "temp_files"
+MAX_IN_MEMORY_SIZE_MB = 5  # Larger uploads are spooled to disk before parsing
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes copied per chunk when spooling uploads to disk
+TEMP_DIR_PREFIX = "resume_"  # Spooled uploads go to an OS-managed temp directory with this prefix
+MAX_RESUME_CHARS = 8000  # Resume text beyond this is dropped from the prompt
+CACHE_DIR = ".cache"  # On-disk cache of extracted text and analyses, keyed by content hash
+CACHE_SIZE_LIMIT_MB = 512  # Oldest cache entries are culled beyond this size
+CACHE_TTL_SECONDS = 24 * 60 * 60  # Cached text and analyses hold contact details; expire after a day
 
 # Output Configuration
 OUTPUT_DIR = "output"
 EXCEL_FILENAME = "resume_analysis_results.xlsx"
 JSON_FILENAME = "resume_analysis_results.json"
+RAW_JSON_PREVIEW_LIMIT = 50  # Results shown in the raw JSON view on the results page
 
 # UI Configuration
 PAGE_TITLE = "AI Resume Analyzer & Chatbot"
@@ -35,11 +49,15 @@ SKILLS_KEYWORDS = [
     "aws", "azure", "gcp", "docker", "kubernetes", "git", "github"
 ]
 
+# Chatbot Configuration
+CHAT_CONTEXT_TOP_K = 5  # Most relevant resumes sent to the model per question
+
 # Error Messages
 ERROR_MESSAGES = {
     "no_api_key": "GEMINI_API_KEY is not set in the .env file",
     "unsupported_format": "Unsupported file format. Please upload PDF or DOCX files.",
     "file_too_large": "File size exceeds maximum limit of 10MB",
+    "invalid_content": "File content does not match its extension; it may be corrupted or incomplete.",
     "processing_error": "Error processing file: {}",
     "api_error": "API error occurred: {}"
 } 
\ No newline at end of file
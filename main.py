@@ -1,13 +1,21 @@
+import os
 import streamlit as st
-import asyncio
-import nest_asyncio
-from pages.home import render_home
-from pages.resume_analyzer import render_resume_analyzer
-from pages.chatbot import render_chatbot
+from utils.file_processor import FileProcessor, get_content_cache
 import config
 
-# Apply nest_asyncio for async support in Streamlit
-nest_asyncio.apply()
+@st.cache_data(ttl=5, show_spinner=False)
+def _dir_status() -> dict:
+    """Check working directories at most every few seconds instead of on every rerun"""
+    return {
+        "output": os.path.isdir(config.OUTPUT_DIR)
+    }
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _list_output_dir():
+    """List the output directory, or None if it does not exist"""
+    if not os.path.isdir(config.OUTPUT_DIR):
+        return None
+    return sorted(os.listdir(config.OUTPUT_DIR))
 
 def main():
     """Main application entry point"""
@@ -81,21 +89,22 @@ def main():
             st.info("Please set GEMINI_API_KEY in your .env file")
         
         # Check directories
-        import os
-        if os.path.exists(config.OUTPUT_DIR):
+        dir_status = _dir_status()
+        if dir_status["output"]:
             st.success("Output Directory Ready")
         else:
             st.warning("Output Directory Missing")
         
-        if os.path.exists(config.TEMP_DIR):
+        # The temp directory is created on first spooled upload, so it is checked live without creating it
+        if FileProcessor.temp_dir_exists():
             st.success("Temp Directory Ready")
         else:
-            st.warning("Temp Directory Missing")
+            st.info("Temp Directory Created on First Use")
         
         # Configuration info
         st.markdown("### Configuration")
         st.markdown(f"""
-        - **Batch Size**: {config.BATCH_SIZE}
+        - **Resumes per Request**: {config.MICRO_BATCH_SIZE}
         - **Max Concurrent**: {config.MAX_CONCURRENT_REQUESTS}
         - **Rate Limit**: {config.RATE_LIMIT_DELAY}s
         - **File Size Limit**: {config.MAX_FILE_SIZE_MB}MB
@@ -104,46 +113,41 @@ def main():
         # Quick actions
         st.markdown("### Quick Actions")
         
-        if st.button("Cleanup Temp Files", use_container_width=True):
+        if st.button("Cleanup Temp Files & Cache", use_container_width=True):
             cleanup_temp_files()
         
         if st.button("View Output Directory", use_container_width=True):
             show_output_directory()
     
-    # Main content area
+    # Main content area; pages are imported on demand so Home does not load the Gemini SDK or parsers
     try:
         if page == "Home":
+            from pages.home import render_home
             render_home()
         elif page == "Resume Analyzer":
+            from pages.resume_analyzer import render_resume_analyzer
             render_resume_analyzer()
         elif page == "Chatbot":
+            from pages.chatbot import render_chatbot
             render_chatbot()
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
         st.info("Please check your configuration and try again.")
 
 def cleanup_temp_files():
-    """Clean up temporary files"""
-    import os
-    import shutil
-    
+    """Clean up temporary files and the cached resume text and analyses"""
     try:
-        if os.path.exists(config.TEMP_DIR):
-            shutil.rmtree(config.TEMP_DIR)
-            os.makedirs(config.TEMP_DIR, exist_ok=True)
-            st.success("Temporary files cleaned up successfully!")
-        else:
-            st.info("No temporary directory found.")
+        FileProcessor.reset_temp_dir()
+        get_content_cache().clear()
+        st.success("Temporary files and cached analyses cleaned up successfully!")
     except Exception as e:
         st.error(f"Failed to cleanup temp files: {str(e)}")
 
 def show_output_directory():
     """Show contents of output directory"""
-    import os
-    
     try:
-        if os.path.exists(config.OUTPUT_DIR):
-            files = os.listdir(config.OUTPUT_DIR)
+        files = _list_output_dir()
+        if files is not None:
             if files:
                 st.info(f"Output directory contains {len(files)} files:")
                 for file in files:
@@ -0,0 +1,13 @@
+import streamlit as st
+import config
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_model():
+    """Configure the Gemini client once and share the model across reruns and sessions"""
+    # Imported here so pages that never call Gemini do not pay for loading the SDK
+    import google.generativeai as genai
+    
+    # No transport is passed: the SDK applies client settings to every client it builds, and each
+    # client's default (grpc for sync, grpc_asyncio for async) must be kept for async calls to work
+    genai.configure(api_key=config.GEMINI_API_KEY)
+    return genai.GenerativeModel(config.MODEL_NAME)
@@ -1,11 +1,89 @@
-import json
 import asyncio
+import concurrent.futures
+import hashlib
+import random
+import re
+import textwrap
 import time
-from typing import List, Dict, Any
-import google.generativeai as genai
-from utils.file_processor import FileProcessor
+from typing import List, Dict, Any, Optional, Tuple
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from models.gemini_model import get_gemini_model
+from models.resume_schema import ResumeAnalysis, MicroBatchAnalysis
+from utils.file_processor import FileProcessor, get_content_cache
+from utils.rate_limiter import AsyncRateLimiter, AdaptiveSemaphore
 import config
 
+# Bump when the analysis prompt changes so cached analyses are not reused
+PROMPT_VERSION = 4
+
+# Prompt templates are built once at import; the output structure is enforced through GENERATION_CONFIG
+ANALYSIS_PROMPT_TEMPLATE = textwrap.dedent("""\
+    Analyze this resume.
+    Resume text:
+    {text}""")
+
+MICRO_BATCH_PROMPT_TEMPLATE = textwrap.dedent("""\
+    Analyze each resume below. Return a JSON list with exactly one element per resume, and set resume_index and file_name in each element to the number and file name from the header of the resume it analyzes.
+    {sections}""")
+
+MICRO_BATCH_SECTION_TEMPLATE = "---\nResume {index} (file={file_name}):\n{text}\n"
+
+# Structured output: Gemini returns JSON matching ResumeAnalysis
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": ResumeAnalysis
+}
+
+MICRO_BATCH_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": list[MicroBatchAnalysis]
+}
+
+MICRO_BATCH_ANALYSIS_LIST = TypeAdapter(List[MicroBatchAnalysis])
+
+RETRYABLE_ERROR_MARKERS = ("429", "quota", "rate limit", "rate_limit", "resource_exhausted", "resource exhausted", "503", "unavailable")
+
+def is_retryable_error(error) -> bool:
+    """Check whether an API error (or error message) is a rate-limit or transient availability error"""
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_ERROR_MARKERS)
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Return the server-requested retry delay in seconds, if the error exposes one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    
+    # gRPC errors carry a RetryInfo detail instead of a header
+    for detail in getattr(error, "details", None) or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+    
+    return None
+
+def summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the fields the results page displays; the full result lives in the JSON Lines file"""
+    if "error" in result:
+        return {"error": result["error"], "file_name": result.get("file_name", "Unknown")}
+    
+    education = result.get("education", {})
+    return {
+        "name": result.get("name", ""),
+        "education": {
+            "university": education.get("university", ""),
+            "course": education.get("course", "")
+        },
+        "experience_scores": result.get("experience_scores", {}),
+        "analysis_metadata": {"file_name": result.get("analysis_metadata", {}).get("file_name", "")}
+    }
+
 class ResumeParser:
     """Handles AI-powered resume analysis with batch processing capabilities"""
     
@@ -14,85 +92,101 @@ class ResumeParser:
         if not config.GEMINI_API_KEY:
             raise ValueError(config.ERROR_MESSAGES["no_api_key"])
         
-        genai.configure(api_key=config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(config.MODEL_NAME)
+        self.model = get_gemini_model()
         self.file_processor = FileProcessor()
+        
+        # One limiter paces every API call from this parser, across batches, fallbacks and retries;
+        # all batches run on the shared analysis loop, so its lock is never used from two loops
+        self.rate_limiter = AsyncRateLimiter(config.RATE_LIMIT_DELAY)
+    
+    @staticmethod
+    def _trim_resume_text(text: str) -> str:
+        """Collapse redundant whitespace and cap resume text at the character budget"""
+        text = re.sub(r"[ \t]+", " ", text)
+        text = re.sub(r"\n\s*\n+", "\n", text).strip()
+        return text[:config.MAX_RESUME_CHARS]
     
     def create_analysis_prompt(self, text: str) -> str:
-        """Create the analysis prompt for resume text"""
-        return f"""
-        Analyze the following resume and extract the following information in JSON format:
-        
-        {{
-            "name": "Full name of the person",
-            "contact_details": {{
-                "email": "Email address",
-                "phone": "Phone number",
-                "location": "City, State/Country"
-            }},
-            "education": {{
-                "university": "University/Institution name",
-                "year_of_study": "Current year or graduation year",
-                "course": "Degree program name",
-                "discipline": "Field of study",
-                "cgpa_percentage": "CGPA or percentage if available"
-            }},
-            "skills": {{
-                "technical_skills": ["List of technical skills"],
-                "soft_skills": ["List of soft skills"],
-                "programming_languages": ["List of programming languages"],
-                "tools_technologies": ["List of tools and technologies"]
-            }},
-            "experience_scores": {{
-                "ai_ml_experience": "Score from 1-10 based on AI/ML experience",
-                "gen_ai_experience": "Score from 1-10 based on Gen AI experience",
-                "overall_experience": "Score from 1-10 based on overall experience"
-            }},
-            "supporting_information": {{
-                "certifications": ["List of relevant certifications"],
-                "internships": ["List of internships"],
-                "projects": ["List of relevant projects"],
-                "achievements": ["List of achievements"]
-            }},
-            "analysis_metadata": {{
-                "processing_timestamp": "Current timestamp",
-                "file_name": "Original file name",
-                "confidence_score": "Confidence in analysis (1-10)"
-            }}
-        }}
-        
-        Resume text:
-        {text}
-        
-        Please ensure the response is valid JSON format only.
-        """
-    
-    async def analyze_single_resume(self, file_path: str, file_name: str) -> Dict[str, Any]:
-        """Analyze a single resume asynchronously"""
+        """Create the analysis prompt for resume text, trimmed to the character budget"""
+        return ANALYSIS_PROMPT_TEMPLATE.format_map({"text": self._trim_resume_text(text)})
+    
+    def create_micro_batch_prompt(self, items: List[Tuple[str, str]]) -> str:
+        """Create a single prompt analyzing several (file_name, text) resumes"""
+        sections = "".join(
+            MICRO_BATCH_SECTION_TEMPLATE.format_map(
+                {"index": index, "file_name": file_name, "text": self._trim_resume_text(text)}
+            )
+            for index, (file_name, text) in enumerate(items, start=1)
+        )
+        return MICRO_BATCH_PROMPT_TEMPLATE.format_map({"sections": sections})
+    
+    @staticmethod
+    def _cache_key(text: str) -> tuple:
+        """Key analyses by prompt version and resume text hash"""
+        return ("analysis", PROMPT_VERSION, hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest())
+    
+    def get_cached_analysis(self, text: str) -> Optional[Dict[str, Any]]:
+        """Return a previous analysis of identical resume text, if any (each read is a fresh copy)"""
+        return get_content_cache().get(self._cache_key(text))
+    
+    def cache_analysis(self, text: str, analysis_result: Dict[str, Any]):
+        """Store an analysis on disk; the cache culls old entries beyond its size limit"""
+        get_content_cache().set(self._cache_key(text), analysis_result, expire=config.CACHE_TTL_SECONDS)
+    
+    @staticmethod
+    def _add_metadata(analysis_result: Dict[str, Any], file_name: str) -> Dict[str, Any]:
+        """Stamp an analysis with its source file and processing time"""
+        analysis_result["analysis_metadata"]["file_name"] = file_name
+        analysis_result["analysis_metadata"]["processing_timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return analysis_result
+    
+    async def _generate_with_retry(self, prompt: str, generation_config: Dict[str, Any] = None,
+                                   max_attempts: int = None, base: float = None, cap: float = None):
+        """Call the Gemini API, retrying rate-limit and transient errors with exponential backoff"""
+        max_attempts = max_attempts or config.MAX_RETRY_ATTEMPTS
+        base = config.RETRY_BASE_DELAY if base is None else base
+        cap = config.RETRY_MAX_DELAY if cap is None else cap
+        
+        for attempt in range(max_attempts):
+            # Space out API calls across all concurrent workers, including retries
+            await self.rate_limiter.acquire()
+            try:
+                # Native async call over the shared grpc_asyncio channel; the channel is bound to the
+                # long-lived analysis loop, so batches must run there rather than under asyncio.run
+                return await self.model.generate_content_async(prompt, generation_config=generation_config)
+            except Exception as e:
+                if attempt == max_attempts - 1 or not is_retryable_error(e):
+                    raise
+                
+                delay = get_retry_after(e)
+                if delay is None:
+                    delay = min(cap, base * 2 ** attempt) + random.uniform(0, 0.5)
+                await asyncio.sleep(delay)
+    
+    async def analyze_single_resume(self, text: str, file_name: str) -> Dict[str, Any]:
+        """Analyze a single resume's extracted text asynchronously"""
+        response = None
         try:
-            # Extract text from file
-            text = self.file_processor.extract_text_from_file(file_path)
-            
-            # Create analysis prompt
-            prompt = self.create_analysis_prompt(text)
+            analysis_result = self.get_cached_analysis(text)
             
-            # Call Gemini API
-            response = self.model.generate_content(prompt)
-            
-            # Parse JSON response
-            analysis_result = json.loads(response.text.strip())
-            
-            # Add metadata
-            analysis_result["analysis_metadata"]["file_name"] = file_name
-            analysis_result["analysis_metadata"]["processing_timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            if analysis_result is None:
+                # Create analysis prompt
+                prompt = self.create_analysis_prompt(text)
+                
+                # Call Gemini API off the event loop so concurrent requests overlap
+                response = await self._generate_with_retry(prompt, generation_config=GENERATION_CONFIG)
+                
+                # Validate the structured JSON response
+                analysis_result = ResumeAnalysis.model_validate_json(response.text).model_dump()
+                self.cache_analysis(text, analysis_result)
             
-            return analysis_result
+            return self._add_metadata(analysis_result, file_name)
             
-        except json.JSONDecodeError as e:
+        except ValidationError as e:
             return {
                 "error": f"Failed to parse AI response as JSON: {str(e)}",
                 "file_name": file_name,
-                "raw_response": response.text if 'response' in locals() else "No response"
+                "raw_response": response.text if response is not None else "No response"
             }
         except Exception as e:
             return {
@@ -100,65 +194,184 @@ class ResumeParser:
                 "file_name": file_name
             }
     
-    async def process_batch(self, files: List, progress_callback=None) -> List[Dict[str, Any]]:
-        """Process a batch of resumes with rate limiting and progress tracking"""
+    async def analyze_micro_batch(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Analyze several (file_name, text) resumes with one API call, in input order"""
+        if len(items) == 1:
+            file_name, text = items[0]
+            return [await self.analyze_single_resume(text, file_name)]
+        
+        try:
+            prompt = self.create_micro_batch_prompt(items)
+            response = await self._generate_with_retry(prompt, generation_config=MICRO_BATCH_GENERATION_CONFIG)
+            analyses = MICRO_BATCH_ANALYSIS_LIST.validate_json(response.text)
+        except ValidationError:
+            # A malformed or truncated combined response says nothing about the individual resumes;
+            # analyze them one by one, where each response is smaller and fails on its own
+            return [await self.analyze_single_resume(text, file_name) for file_name, text in items]
+        except Exception as e:
+            return [{
+                "error": f"Error analyzing resume: {str(e)}",
+                "file_name": file_name
+            } for file_name, _ in items]
+        
+        # Match analyses to resumes by the index and file name the model echoed back, never by position.
+        # Unless every resume gets exactly one matching analysis, analyze individually instead, one after
+        # another within this batch's concurrency slot rather than as a burst; nothing is cached before that
+        by_index = {analysis.resume_index: analysis for analysis in analyses}
+        if len(analyses) != len(items) or any(
+            index not in by_index or by_index[index].file_name != file_name
+            for index, (file_name, _) in enumerate(items, start=1)
+        ):
+            return [await self.analyze_single_resume(text, file_name) for file_name, text in items]
+        
+        results = []
+        for index, (file_name, text) in enumerate(items, start=1):
+            analysis_result = by_index[index].model_dump(exclude={"resume_index", "file_name"})
+            self.cache_analysis(text, analysis_result)
+            results.append(self._add_metadata(analysis_result, file_name))
+        
+        return results
+    
+    async def prepare_file(self, file) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Validate an upload and extract its text; returns (text, None) or (None, error result)"""
+        is_valid, error_msg = self.file_processor.validate_file(file)
+        if not is_valid:
+            return None, {"error": error_msg, "file_name": file.name}
+        
+        try:
+            text = await self.file_processor.extract_text_async(file)
+            return text, None
+        except Exception as e:
+            return None, {
+                "error": config.ERROR_MESSAGES["processing_error"].format(str(e)),
+                "file_name": file.name
+            }
+    
+    async def process_batch(self, files: List, progress_callback=None,
+                            results_path: str = None) -> List[Dict[str, Any]]:
+        """Process resumes in concurrent micro-batches with rate limiting and progress tracking"""
+        # With results_path, full results are streamed to that JSON Lines file as they complete
+        # and only lightweight summaries are kept, so memory stays flat in the batch size
         results = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
+        completed = 0
+        results_file = open(results_path, "a", encoding="utf-8") if results_path else None
+        semaphore = AdaptiveSemaphore(
+            config.MIN_CONCURRENT_REQUESTS,
+            config.MAX_CONCURRENT_REQUESTS,
+            config.TARGET_LATENCY_SECONDS,
+            window=config.LATENCY_WINDOW
+        )
+        self.rate_limiter.min_interval = max(0.0, config.RATE_LIMIT_DELAY)
         
-        async def process_file(file):
+        def collect(new_results):
+            nonlocal completed
+            completed += len(new_results)
+            
+            if results_file is not None:
+                for result in new_results:
+                    results_file.write(orjson.dumps(result).decode() + "\n")
+                    results.append(summarize_result(result))
+                results_file.flush()
+            else:
+                results.extend(new_results)
+            
+            # Report progress as finished resumes out of the batch total
+            if progress_callback:
+                progress_callback(completed, len(files))
+        
+        async def process_micro_batch(batch):
             async with semaphore:
-                # Validate file
-                is_valid, error_msg = self.file_processor.validate_file(file)
-                if not is_valid:
-                    return {"error": error_msg, "file_name": file.name}
-                
-                # Save file temporarily
-                temp_file_path = self.file_processor.save_uploaded_file(file)
-                
+                # Analyze the micro-batch, feeding per-resume latency back into the concurrency limit
+                loop = asyncio.get_running_loop()
+                t0 = loop.time()
                 try:
-                    # Analyze resume
-                    result = await self.analyze_single_resume(temp_file_path, file.name)
-                    
-                    # Add file info
+                    batch_results = await self.analyze_micro_batch(
+                        [(file.name, text) for file, text in batch]
+                    )
+                except Exception as e:
+                    batch_results = [{
+                        "error": f"Processing error: {str(e)}",
+                        "file_name": file.name
+                    } for file, _ in batch]
+                throttled = any("error" in r and is_retryable_error(r["error"]) for r in batch_results)
+                await semaphore.record((loop.time() - t0) / len(batch), success=not throttled)
+                
+                # Add file info
+                for (file, _), result in zip(batch, batch_results):
                     result["file_info"] = self.file_processor.get_file_info(file)
-                    
-                    return result
-                    
-                finally:
-                    # Cleanup temporary file
-                    self.file_processor.cleanup_temp_file(temp_file_path)
+                
+                # Progress counts finished resumes, not submitted ones
+                collect(batch_results)
         
-        # Process files in batches
-        for i in range(0, len(files), config.BATCH_SIZE):
-            batch = files[i:i + config.BATCH_SIZE]
-            
-            # Create tasks for current batch
-            tasks = [process_file(file) for file in batch]
-            
-            # Execute batch with progress tracking
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Handle exceptions and add to results
-            for j, result in enumerate(batch_results):
-                if isinstance(result, Exception):
-                    results.append({
-                        "error": f"Processing error: {str(result)}",
-                        "file_name": batch[j].name
-                    })
-                else:
-                    results.append(result)
-            
-            # Update progress
-            if progress_callback:
-                progress = min((i + len(batch)) / len(files) * 100, 100)
-                progress_callback(progress)
+        async def prepare(file):
+            return file, await self.prepare_file(file)
+        
+        try:
+            # Extract all files in parallel and dispatch a micro-batch as soon as enough texts are ready,
+            # so parsing overlaps with API calls; cached analyses and failures complete immediately.
+            # The semaphore frees a slot as soon as any request finishes, and the task group waits for all
+            batch_size = max(1, config.MICRO_BATCH_SIZE)
+            pending = []
             
-            # Rate limiting delay between batches
-            if i + config.BATCH_SIZE < len(files):
-                await asyncio.sleep(config.RATE_LIMIT_DELAY)
+            async with asyncio.TaskGroup() as task_group:
+                for prepared in asyncio.as_completed([prepare(file) for file in files]):
+                    file, (text, error_result) = await prepared
+                    if error_result is not None:
+                        collect([error_result])
+                        continue
+                    
+                    cached = self.get_cached_analysis(text)
+                    if cached is not None:
+                        cached = self._add_metadata(cached, file.name)
+                        cached["file_info"] = self.file_processor.get_file_info(file)
+                        collect([cached])
+                        continue
+                    
+                    pending.append((file, text))
+                    if len(pending) == batch_size:
+                        task_group.create_task(process_micro_batch(pending))
+                        pending = []
+                
+                if pending:
+                    task_group.create_task(process_micro_batch(pending))
+        finally:
+            if results_file is not None:
+                results_file.close()
         
         return results
     
-    def analyze_resumes_sync(self, files: List) -> List[Dict[str, Any]]:
-        """Synchronous wrapper for batch processing"""
-        return asyncio.run(self.process_batch(files)) 
\ No newline at end of file
+    def analyze_resumes_sync(self, files: List, loop: asyncio.AbstractEventLoop, on_poll=None,
+                             poll_interval: float = 0.1, results_path: str = None,
+                             heartbeat_interval: float = 1.0) -> List[Dict[str, Any]]:
+        """Synchronous wrapper running batch processing on the long-lived event loop in another thread"""
+        # There is no asyncio.run fallback: the async gRPC channel stays bound to the loop that first
+        # used it, so every batch must run on the same loop
+        
+        # Progress is counted on the loop thread and reported from the calling thread at most once per
+        # poll interval, and only when it changed, so large batches do not flood the UI with updates.
+        # on_poll is also repeated every heartbeat_interval while nothing completes: Streamlit can only
+        # deliver a stop or rerun through a Streamlit call, and it must not wait for the next resume
+        progress = {"completed": 0}
+        reported = None
+        last_reported_at = time.monotonic()
+        
+        def record_progress(completed, total):
+            progress["completed"] = completed
+        
+        future = asyncio.run_coroutine_threadsafe(self.process_batch(files, record_progress, results_path), loop)
+        try:
+            while True:
+                done, _ = concurrent.futures.wait([future], timeout=poll_interval)
+                completed = progress["completed"]
+                now = time.monotonic()
+                if on_poll and (completed != reported or now - last_reported_at >= heartbeat_interval):
+                    on_poll(completed, len(files))
+                    reported = completed
+                    last_reported_at = now
+                if done:
+                    return future.result()
+        finally:
+            # Streamlit stops or reruns the script by raising from on_poll; stop the batch with it
+            # instead of leaving it running on the shared loop
+            if not future.done():
+                future.cancel()
\ No newline at end of file
@@ -0,0 +1,55 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+class ContactDetails(BaseModel):
+    """Candidate contact information"""
+    email: str
+    phone: str
+    location: str = Field(description="City, State/Country")
+
+class Education(BaseModel):
+    """Candidate's most recent education"""
+    university: str = Field(description="University/Institution name")
+    year_of_study: str = Field(description="Current year or graduation year")
+    course: str = Field(description="Degree program name")
+    discipline: str = Field(description="Field of study")
+    cgpa_percentage: str = Field(description="CGPA or percentage if available")
+
+class Skills(BaseModel):
+    """Skills listed or demonstrated in the resume"""
+    technical_skills: List[str]
+    soft_skills: List[str]
+    programming_languages: List[str]
+    tools_technologies: List[str]
+
+class ExperienceScores(BaseModel):
+    """Experience ratings on a 1-10 scale"""
+    ai_ml_experience: int = Field(description="Score from 1-10 based on AI/ML experience")
+    gen_ai_experience: int = Field(description="Score from 1-10 based on Gen AI experience")
+    overall_experience: int = Field(description="Score from 1-10 based on overall experience")
+
+class SupportingInformation(BaseModel):
+    """Evidence supporting the experience scores"""
+    certifications: List[str]
+    internships: List[str]
+    projects: List[str]
+    achievements: List[str]
+
+class AnalysisMetadata(BaseModel):
+    """Model-reported analysis quality; file name and timestamp are added after parsing"""
+    confidence_score: int = Field(description="Confidence in analysis (1-10)")
+
+class ResumeAnalysis(BaseModel):
+    """Structured resume analysis returned by Gemini"""
+    name: str = Field(description="Full name of the person")
+    contact_details: ContactDetails
+    education: Education
+    skills: Skills
+    experience_scores: ExperienceScores
+    supporting_information: SupportingInformation
+    analysis_metadata: AnalysisMetadata
+
+class MicroBatchAnalysis(ResumeAnalysis):
+    """Resume analysis tagged with the micro-batch resume it belongs to"""
+    resume_index: int = Field(description="Number N from the 'Resume N' header of the analyzed resume")
+    file_name: str = Field(description="File name from the header of the analyzed resume")
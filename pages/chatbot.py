@@ -1,5 +1,6 @@
 import streamlit as st
-import google.generativeai as genai
+from models.gemini_model import get_gemini_model
+from utils.analysis_index import AnalysisIndex
 import config
 
 def render_chatbot():
@@ -12,14 +13,12 @@ def render_chatbot():
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
     
-    # Initialize Gemini model
-    if 'chat_model' not in st.session_state:
-        try:
-            genai.configure(api_key=config.GEMINI_API_KEY)
-            st.session_state.chat_model = genai.GenerativeModel(config.MODEL_NAME)
-        except Exception as e:
-            st.error(f"Failed to initialize chatbot: {str(e)}")
-            st.stop()
+    # Initialize Gemini model (shared across reruns and sessions)
+    try:
+        get_gemini_model()
+    except Exception as e:
+        st.error(f"Failed to initialize chatbot: {str(e)}")
+        st.stop()
     
     # Display chat interface
     st.header("Chat Interface")
@@ -31,15 +30,6 @@ def render_chatbot():
         height=100
     )
     
-    # Analysis context (if available)
-    analysis_context = ""
-    if 'analysis_results' in st.session_state and st.session_state.analysis_results:
-        analysis_context = f"""
-        Based on the following resume analysis results, answer the user's question:
-        
-        {st.session_state.analysis_results}
-        """
-    
     # Chat controls
     col1, col2 = st.columns([3, 1])
     
@@ -48,7 +38,7 @@ def render_chatbot():
             if not user_question.strip():
                 st.error("Please enter a question.")
             else:
-                process_chat_question(user_question, analysis_context)
+                process_chat_question(user_question)
     
     with col2:
         if st.button("Clear Chat", use_container_width=True):
@@ -82,16 +72,28 @@ def render_chatbot():
     for i, question in enumerate(sample_questions):
         with cols[i % 2]:
             if st.button(question, key=f"sample_{i}", use_container_width=True):
-                process_chat_question(question, analysis_context)
+                process_chat_question(question)
 
-def process_chat_question(question: str, context: str):
+def process_chat_question(question: str):
     """Process a chat question and generate response"""
     
     try:
-        # Create prompt with context
-        if context:
+        analysis_index = st.session_state.get("analysis_index")
+        
+        # Ranking and counting questions are answered from the index without an API call
+        answer = analysis_index.answer_structured(question) if analysis_index else None
+        if answer is not None:
+            st.session_state.chat_history.append((question, answer))
+            st.success("Response generated!")
+            st.markdown(f"**Answer:** {answer}")
+            return
+        
+        # Create prompt with only the most relevant resumes as context
+        if analysis_index and analysis_index.records:
             prompt = f"""
-            {context}
+            Based on the following resume analysis results, answer the user's question:
+            
+            {analysis_index.context_for(question, k=config.CHAT_CONTEXT_TOP_K)}
             
             User Question: {question}
             
@@ -106,17 +108,21 @@ def process_chat_question(question: str, context: str):
             Please provide a general response about what kind of insights could be obtained from resume analysis.
             """
         
-        # Generate response
+        # Stream the response so text renders as it arrives
         with st.spinner("Thinking..."):
-            response = st.session_state.chat_model.generate_content(prompt)
-            answer = response.text
+            response = get_gemini_model().generate_content(prompt, stream=True)
+        
+        placeholder = st.empty()
+        answer_parts = []
+        for chunk in response:
+            answer_parts.append(chunk.text)
+            placeholder.markdown(f"**Answer:** {''.join(answer_parts)}")
+        answer = "".join(answer_parts)
         
         # Add to chat history
         st.session_state.chat_history.append((question, answer))
         
-        # Display response
         st.success("Response generated!")
-        st.markdown(f"**Answer:** {answer}")
         
     except Exception as e:
         st.error(f"Failed to generate response: {str(e)}")
@@ -137,7 +143,9 @@ def render_analysis_context_upload():
         try:
             import json
             analysis_data = json.load(uploaded_file)
-            st.session_state.analysis_results = json.dumps(analysis_data, indent=2)
+            results = analysis_data.get("results", []) if isinstance(analysis_data, dict) else analysis_data
+            st.session_state.analysis_results = json.dumps(results, separators=(",", ":"))
+            st.session_state.analysis_index = AnalysisIndex(results)
             st.success("Analysis context loaded successfully!")
         except Exception as e:
             st.error(f"Failed to load analysis context: {str(e)}")
@@ -44,7 +44,7 @@ def render_home():
         st.markdown("""
         **Processing Features:**
         - Asynchronous batch processing
-        - Configurable batch sizes (1-20 files)
+        - Configurable resumes per request (1-10 files)
         - Concurrent API request management
         - Error handling and recovery
         - Temporary file management
@@ -110,18 +110,20 @@ def render_home():
     ├── requirements.txt       # Python dependencies
     ├── models/
     │   ├── resume_parser.py   # AI analysis logic
+    │   ├── resume_schema.py   # Structured output schema
+    │   ├── gemini_model.py    # Shared Gemini model
     │   └── __init__.py
     ├── utils/
     │   ├── file_processor.py  # File handling utilities
     │   ├── output_handler.py  # Output generation
+    │   ├── rate_limiter.py    # API pacing and concurrency control
     │   └── __init__.py
     ├── pages/
     │   ├── home.py           # Home page
     │   ├── resume_analyzer.py # Main analysis page
     │   ├── chatbot.py        # Chatbot interface
     │   └── __init__.py
-    ├── output/               # Generated reports
-    └── temp_files/           # Temporary processing files
+    └── output/               # Generated reports
     ```
     """)
     
@@ -1,11 +1,38 @@
 import streamlit as st
 import asyncio
+import threading
 from typing import List
 import pandas as pd
+import orjson
 from models.resume_parser import ResumeParser
 from utils.output_handler import OutputHandler
+from utils.analysis_index import AnalysisIndex
 import config
 
+@st.cache_resource(show_spinner=False)
+def get_parser() -> ResumeParser:
+    """Create the resume parser once and share it across reruns and sessions"""
+    return ResumeParser()
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Start one long-lived event loop on a background thread, shared across reruns and sessions"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="resume-analysis-loop", daemon=True).start()
+    return loop
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_excel_report(results_path: str) -> bytes:
+    """Build the Excel report for a finished batch once; its results file does not change afterwards"""
+    output_handler = OutputHandler()
+    return output_handler.build_excel_bytes(output_handler.load_results(results_path))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_json_report(results_path: str) -> bytes:
+    """Build the JSON report for a finished batch once; its results file does not change afterwards"""
+    output_handler = OutputHandler()
+    return output_handler.build_json_bytes(output_handler.load_results(results_path))
+
 def render_resume_analyzer():
     """Render the resume analyzer page with batch processing capabilities"""
     
@@ -13,15 +40,17 @@ def render_resume_analyzer():
     st.markdown("Upload multiple resumes for batch analysis with AI-powered insights")
     
     # Initialize components
-    if 'resume_parser' not in st.session_state:
-        try:
-            st.session_state.resume_parser = ResumeParser()
-        except ValueError as e:
-            st.error(str(e))
-            st.stop()
+    try:
+        get_parser()
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
     
     if 'output_handler' not in st.session_state:
         st.session_state.output_handler = OutputHandler()
+        
+        # Results files hold candidate contact details; drop ones left by old sessions
+        st.session_state.output_handler.cleanup_old_files()
     
     # File upload section
     st.header("Upload Resumes")
@@ -50,8 +79,7 @@ def render_resume_analyzer():
                 "Type": file.type
             })
         
-        df_files = pd.DataFrame(file_info)
-        st.dataframe(df_files, use_container_width=True)
+        st.dataframe(file_info, use_container_width=True)
     
     # Analysis controls
     if uploaded_files and len(uploaded_files) > 0:
@@ -61,11 +89,11 @@ def render_resume_analyzer():
         
         with col1:
             batch_size = st.slider(
-                "Batch Size",
+                "Resumes per Request",
                 min_value=1,
-                max_value=20,
-                value=config.BATCH_SIZE,
-                help="Number of resumes to process simultaneously"
+                max_value=10,
+                value=config.MICRO_BATCH_SIZE,
+                help="Number of resumes analyzed together in a single API call"
             )
         
         with col2:
@@ -89,9 +117,16 @@ def render_resume_analyzer():
         
         # Start analysis button
         if st.button("Start Analysis", type="primary", use_container_width=True):
-            asyncio.run(run_batch_analysis(uploaded_files, batch_size, max_concurrent, rate_limit))
+            run_batch_analysis(uploaded_files, batch_size, max_concurrent, rate_limit)
+        elif "analysis_summaries" in st.session_state:
+            # Keep the last results on screen across reruns triggered by result widgets
+            display_analysis_results(
+                st.session_state.analysis_summaries,
+                st.session_state.output_handler,
+                st.session_state.analysis_results_path
+            )
 
-async def run_batch_analysis(files: List, batch_size: int, max_concurrent: int, rate_limit: float):
+def run_batch_analysis(files: List, batch_size: int, max_concurrent: int, rate_limit: float):
     """Run batch analysis with progress tracking"""
     
     # Create progress bar
@@ -103,26 +138,37 @@ async def run_batch_analysis(files: List, batch_size: int, max_concurrent: int,
     
     try:
         # Update configuration for this run
-        config.BATCH_SIZE = batch_size
+        config.MICRO_BATCH_SIZE = batch_size
         config.MAX_CONCURRENT_REQUESTS = max_concurrent
         config.RATE_LIMIT_DELAY = rate_limit
         
         # Initialize parser
-        parser = ResumeParser()
+        parser = get_parser()
         output_handler = OutputHandler()
         
         # Progress callback
-        def update_progress(progress):
-            progress_bar.progress(progress / 100)
-            status_text.text(f"Processing... {progress:.1f}%")
+        def update_progress(completed, total):
+            progress_bar.progress(completed / total)
+            status_text.text(f"Processed {completed} of {total} resumes...")
         
-        # Run analysis
+        # Run analysis on the background loop; progress is painted from this thread while it runs
         status_text.text("Starting analysis...")
-        results = await parser.process_batch(files, update_progress)
+        results_path = output_handler.new_results_path()
+        results = parser.analyze_resumes_sync(
+            files, loop=get_event_loop(), on_poll=update_progress, results_path=results_path
+        )
+        
+        # Make the full results available to the chatbot, removing the results file this run replaces
+        previous_results_path = st.session_state.get("analysis_results_path")
+        if previous_results_path and previous_results_path != results_path:
+            output_handler.remove_results(previous_results_path)
+        st.session_state.analysis_results_path = results_path
+        st.session_state.analysis_summaries = results
+        st.session_state.analysis_index = AnalysisIndex(output_handler.load_results(results_path))
         
         # Display results
         with results_container:
-            display_analysis_results(results, output_handler)
+            display_analysis_results(results, output_handler, results_path)
             
     except Exception as e:
         st.error(f"Analysis failed: {str(e)}")
@@ -130,13 +176,16 @@ async def run_batch_analysis(files: List, batch_size: int, max_concurrent: int,
         progress_bar.empty()
         status_text.empty()
 
-def display_analysis_results(results: List, output_handler: OutputHandler):
-    """Display analysis results with summary and download options"""
+def display_analysis_results(results: List, output_handler: OutputHandler, results_path: str):
+    """Display analysis summaries; reports are built from the full results in results_path"""
     
     st.header("Analysis Results")
     
+    # Separate successful and failed results once for the statistics and tables below
+    successful_results, failed_results = output_handler.partition_results(results)
+    
     # Generate summary statistics
-    stats = output_handler.generate_summary_stats(results)
+    stats = output_handler.generate_summary_stats(results, (successful_results, failed_results))
     
     # Display summary metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -171,10 +220,6 @@ def display_analysis_results(results: List, output_handler: OutputHandler):
     # Display detailed results
     st.subheader("Detailed Results")
     
-    # Separate successful and failed results
-    successful_results = [r for r in results if "error" not in r]
-    failed_results = [r for r in results if "error" in r]
-    
     # Show successful results
     if successful_results:
         st.success(f"Successfully analyzed {len(successful_results)} resumes")
@@ -191,8 +236,7 @@ def display_analysis_results(results: List, output_handler: OutputHandler):
                 "File": result.get("analysis_metadata", {}).get("file_name", "N/A")
             })
         
-        df_summary = pd.DataFrame(summary_data)
-        st.dataframe(df_summary, use_container_width=True)
+        st.dataframe(summary_data, use_container_width=True)
     
     # Show failed results
     if failed_results:
@@ -205,42 +249,44 @@ def display_analysis_results(results: List, output_handler: OutputHandler):
                 "Error": result.get("error", "Unknown error")
             })
         
-        df_errors = pd.DataFrame(error_data)
-        st.dataframe(df_errors, use_container_width=True)
+        st.dataframe(error_data, use_container_width=True)
     
     # Download options
     st.header("Download Results")
     
     col1, col2 = st.columns(2)
     
+    timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
+    
     with col1:
-        if st.button("Download Excel Report", use_container_width=True):
-            try:
-                excel_path = output_handler.save_to_excel(results)
-                with open(excel_path, "rb") as f:
-                    st.download_button(
-                        label="Click to Download Excel",
-                        data=f.read(),
-                        file_name=f"resume_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-            except Exception as e:
-                st.error(f"Failed to generate Excel report: {str(e)}")
+        try:
+            st.download_button(
+                label="Download Excel Report",
+                data=build_excel_report(results_path),
+                file_name=f"resume_analysis_{timestamp}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True
+            )
+        except Exception as e:
+            st.error(f"Failed to generate Excel report: {str(e)}")
     
     with col2:
-        if st.button("Download JSON Report", use_container_width=True):
-            try:
-                json_path = output_handler.save_to_json(results)
-                with open(json_path, "rb") as f:
-                    st.download_button(
-                        label="Click to Download JSON",
-                        data=f.read(),
-                        file_name=f"resume_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
-                        mime="application/json"
-                    )
-            except Exception as e:
-                st.error(f"Failed to generate JSON report: {str(e)}")
+        try:
+            st.download_button(
+                label="Download JSON Report",
+                data=build_json_report(results_path),
+                file_name=f"resume_analysis_{timestamp}.json",
+                mime="application/json",
+                use_container_width=True
+            )
+        except Exception as e:
+            st.error(f"Failed to generate JSON report: {str(e)}")
     
     # Show raw results in expandable section
     with st.expander("View Raw Analysis Data"):
-        st.json(results) 
\ No newline at end of file
+        # Serialized only on request, and only the first few results, instead of on every rerun
+        if st.button("Render raw JSON"):
+            preview = output_handler.load_results(results_path, limit=config.RAW_JSON_PREVIEW_LIMIT)
+            if len(results) > len(preview):
+                st.caption(f"Showing the first {len(preview)} of {len(results)} results; download the JSON report for all of them")
+            st.code(orjson.dumps(preview, option=orjson.OPT_INDENT_2).decode(), language="json") 
\ No newline at end of file
@@ -0,0 +1,110 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional
+import pandas as pd
+import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+RANKING_PATTERN = re.compile(r"\b(highest|top|max|maximum|most|best|lowest|least|min|minimum)\b")
+COUNT_PATTERN = re.compile(r"\b(count|how many|number of)\b")
+ASCENDING_PATTERN = re.compile(r"\b(lowest|least|min|minimum)\b")
+
+# Question phrases mapped to the score columns they refer to, checked in order. The overall score is
+# only used when asked for by name; other "experience" questions (internships, a skill) go to the model
+SCORE_FIELDS = [
+    (re.compile(r"gen\s*ai|generative"), "experience_scores.gen_ai_experience", "Gen AI experience"),
+    (re.compile(r"ai\s*/\s*ml|ai_ml|\bai\b|machine learning|\bml\b"), "experience_scores.ai_ml_experience", "AI/ML experience"),
+    (re.compile(r"\boverall\b|\bexperience\s+scores?\b"), "experience_scores.overall_experience", "overall experience"),
+]
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens used for retrieval"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _contains_phrase(text: str, phrase: str) -> bool:
+    """Whole-word phrase match, so a short skill like ai does not match inside longer words"""
+    return re.search(rf"(?<![a-z0-9]){re.escape(phrase)}(?![a-z0-9])", text) is not None
+
+def _flatten_values(value) -> List[str]:
+    """Collect every string/number leaf of a nested result"""
+    if isinstance(value, dict):
+        return [leaf for item in value.values() for leaf in _flatten_values(item)]
+    if isinstance(value, list):
+        return [leaf for item in value for leaf in _flatten_values(item)]
+    return [str(value)] if value not in (None, "") else []
+
+class AnalysisIndex:
+    """Pre-computed index over analysis results so chat turns only send relevant resumes to the model"""
+    
+    def __init__(self, results: List[Dict[str, Any]]):
+        """Build the DataFrame and TF-IDF vectors for successful analyses"""
+        self.records = [r for r in results if "error" not in r]
+        self.df = pd.json_normalize(self.records) if self.records else pd.DataFrame()
+        
+        documents = [
+            Counter(tokenize(" ".join(_flatten_values({k: v for k, v in r.items() if k != "analysis_metadata"}))))
+            for r in self.records
+        ]
+        document_frequency = Counter(token for doc in documents for token in doc)
+        self.idf = {
+            token: math.log((1 + len(documents)) / (1 + freq)) + 1
+            for token, freq in document_frequency.items()
+        }
+        self.vectors = [self._weigh(doc) for doc in documents]
+    
+    def _weigh(self, counts: Counter) -> Dict[str, float]:
+        """Turn token counts into a unit-length TF-IDF vector"""
+        vector = {token: count * self.idf.get(token, 0.0) for token, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {token: weight / norm for token, weight in vector.items()} if norm else {}
+    
+    def answer_structured(self, question: str) -> Optional[str]:
+        """Answer ranking and counting questions directly from the DataFrame; None if not applicable"""
+        if self.df.empty:
+            return None
+        
+        question_lower = question.lower()
+        
+        if COUNT_PATTERN.search(question_lower):
+            skills = [skill for skill in config.SKILLS_KEYWORDS if _contains_phrase(question_lower, skill)]
+            if skills:
+                matches = [
+                    r.get("name") or r.get("analysis_metadata", {}).get("file_name", "Unknown")
+                    for r in self.records
+                    if all(_contains_phrase(" ".join(_flatten_values(r.get("skills", {}))).lower(), skill) for skill in skills)
+                ]
+                answer = f"{len(matches)} of {len(self.records)} candidates list {', '.join(skills)}."
+                return answer + ("\n\n" + "\n".join(f"- {name}" for name in matches) if matches else "")
+        
+        if RANKING_PATTERN.search(question_lower):
+            for pattern, column, label in SCORE_FIELDS:
+                if pattern.search(question_lower) and column in self.df.columns:
+                    scores = pd.to_numeric(self.df[column], errors="coerce")
+                    ranked = scores.nsmallest(5) if ASCENDING_PATTERN.search(question_lower) else scores.nlargest(5)
+                    if ranked.empty:
+                        return None
+                    
+                    lines = []
+                    for rank, (row, score) in enumerate(ranked.items(), start=1):
+                        name = self.df.at[row, "name"] if "name" in self.df.columns else "Unknown"
+                        file_name = self.df.at[row, "analysis_metadata.file_name"] if "analysis_metadata.file_name" in self.df.columns else ""
+                        lines.append(f"{rank}. {name} ({file_name}) - {score:g}/10")
+                    return f"Candidates ranked by {label} score:\n\n" + "\n".join(lines)
+        
+        return None
+    
+    def top_k(self, question: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Return the k analyses most similar to the question by TF-IDF cosine similarity"""
+        query = self._weigh(Counter(tokenize(question)))
+        scored = [
+            (sum(weight * vector.get(token, 0.0) for token, weight in query.items()), i)
+            for i, vector in enumerate(self.vectors)
+        ]
+        scored.sort(reverse=True)
+        return [self.records[i] for score, i in scored[:k] if score > 0] or self.records[:k]
+    
+    def context_for(self, question: str, k: int = 5) -> str:
+        """Compact JSON of the k most relevant analyses, for use as prompt context"""
+        return json.dumps(self.top_k(question, k), separators=(",", ":"), ensure_ascii=False)
@@ -1,13 +1,98 @@
+import asyncio
+import atexit
+import contextlib
+import hashlib
+import multiprocessing
 import os
+import shutil
 import tempfile
-from pdfminer.high_level import extract_text
-from docx import Document
-from typing import Optional
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional
+import diskcache
+import streamlit as st
 import config
+from utils.text_extraction import extract_text_from_bytes, extract_text_from_path
+
+# Bump when extraction output changes so cached text is not reused
+EXTRACTION_VERSION = 2
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+_temp_dir = None
+_temp_dir_lock = threading.Lock()
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool for CPU-bound text extraction, creating it on first use"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # The pool is created from a worker thread of the threaded Streamlit server, where a plain
+            # fork can deadlock the child; forkserver (spawn where unavailable) starts clean workers
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context(start_method)
+            )
+            atexit.register(_extract_pool.shutdown, wait=False, cancel_futures=True)
+        return _extract_pool
+
+def _discard_extract_pool(pool: ProcessPoolExecutor):
+    """Drop a broken process pool so the next extraction creates a fresh one"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _run_extraction(file_extension: str, func, *args) -> str:
+    """Run an extraction function: PDFs in the process pool, DOCX inline on the calling worker thread"""
+    # PDF parsing is CPU-bound; DOCX parsing is mostly zip I/O and cheap to run in-thread
+    if file_extension == '.pdf':
+        # A crashed worker breaks the whole pool; replace it and retry once
+        for attempt in range(2):
+            pool = get_extract_pool()
+            try:
+                return pool.submit(func, *args).result()
+            except BrokenProcessPool:
+                _discard_extract_pool(pool)
+                if attempt == 1:
+                    raise
+    return func(*args)
+
+@st.cache_resource(show_spinner=False)
+def get_content_cache() -> diskcache.Cache:
+    """Process-wide on-disk cache of extracted text and analyses, keyed by file content hash"""
+    return diskcache.Cache(config.CACHE_DIR, size_limit=config.CACHE_SIZE_LIMIT_MB * 1024 * 1024)
 
 class FileProcessor:
     """Handles file processing for different document formats"""
     
+    @staticmethod
+    def get_temp_dir() -> str:
+        """Return the OS-managed temporary directory for spooled uploads, creating it on first use"""
+        global _temp_dir
+        with _temp_dir_lock:
+            if _temp_dir is None:
+                _temp_dir = tempfile.TemporaryDirectory(prefix=config.TEMP_DIR_PREFIX)
+            return _temp_dir.name
+    
+    @staticmethod
+    def temp_dir_exists() -> bool:
+        """Check whether the temporary directory has been created, without creating it"""
+        with _temp_dir_lock:
+            return _temp_dir is not None and os.path.isdir(_temp_dir.name)
+    
+    @staticmethod
+    def reset_temp_dir():
+        """Delete the temporary directory and everything in it; a fresh one is created on next use"""
+        global _temp_dir
+        with _temp_dir_lock:
+            if _temp_dir is not None:
+                _temp_dir.cleanup()
+                _temp_dir = None
+    
     @staticmethod
     def validate_file(file) -> tuple[bool, str]:
         """Validate uploaded file format and size"""
@@ -24,6 +109,11 @@ class FileProcessor:
         if file_size_mb > config.MAX_FILE_SIZE_MB:
             return False, config.ERROR_MESSAGES["file_too_large"]
         
+        # Check magic bytes so broken or mislabeled files fail here instead of deep inside a parser
+        header = bytes(file.getbuffer()[:8])
+        if not header.startswith(config.FILE_SIGNATURES[file_extension]):
+            return False, config.ERROR_MESSAGES["invalid_content"]
+        
         return True, "File is valid"
     
     @staticmethod
@@ -32,37 +122,74 @@ class FileProcessor:
         file_extension = os.path.splitext(file_path)[1].lower()
         
         try:
-            if file_extension == '.pdf':
-                return extract_text(file_path)
-            elif file_extension == '.docx':
-                doc = Document(file_path)
-                return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-            else:
-                raise ValueError(f"Unsupported file format: {file_extension}")
+            return _run_extraction(file_extension, extract_text_from_path, file_path)
         except Exception as e:
             raise Exception(f"Error extracting text from file: {str(e)}")
     
     @staticmethod
-    def save_uploaded_file(uploaded_file) -> str:
-        """Save uploaded file to temporary location and return path"""
+    def extract_text_from_bytes(data: bytes, file_extension: str) -> str:
+        """Extract text from in-memory PDF or DOCX content"""
+        try:
+            return _run_extraction(file_extension.lower(), extract_text_from_bytes, data, file_extension.lower())
+        except Exception as e:
+            raise Exception(f"Error extracting text from file: {str(e)}")
+    
+    @staticmethod
+    def file_digest(uploaded_file) -> str:
+        """Hash the upload's bytes without copying them; identical files share a digest across reruns"""
+        return hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def extract_text_from_upload(uploaded_file) -> str:
+        """Extract text from an uploaded file, reusing cached text for identical content"""
+        content_cache = get_content_cache()
+        text_key = ("text", EXTRACTION_VERSION, FileProcessor.file_digest(uploaded_file))
+        text = content_cache.get(text_key)
+        if text is not None:
+            return text
+        
+        # Spool to disk only above the in-memory cap
+        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+        if uploaded_file.size <= config.MAX_IN_MEMORY_SIZE_MB * 1024 * 1024:
+            text = FileProcessor.extract_text_from_bytes(uploaded_file.getvalue(), file_extension)
+        else:
+            with FileProcessor.save_uploaded_file(uploaded_file) as temp_file_path:
+                text = FileProcessor.extract_text_from_file(temp_file_path)
+        
+        content_cache.set(text_key, text, expire=config.CACHE_TTL_SECONDS)
+        return text
+    
+    @staticmethod
+    async def extract_text_async(uploaded_file) -> str:
+        """Extract text without blocking the event loop; the worker thread only waits on the process pool for PDFs"""
+        return await asyncio.to_thread(FileProcessor.extract_text_from_upload, uploaded_file)
+    
+    @staticmethod
+    @contextlib.contextmanager
+    def save_uploaded_file(uploaded_file) -> Iterator[str]:
+        """Save uploaded file to a temporary location for the duration of the with block"""
         try:
-            # Create temp directory if it doesn't exist
-            os.makedirs(config.TEMP_DIR, exist_ok=True)
-            
             # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False, 
+            fd, temp_file_path = tempfile.mkstemp(
                 suffix=os.path.splitext(uploaded_file.name)[1],
-                dir=config.TEMP_DIR
+                dir=FileProcessor.get_temp_dir()
             )
-            
-            # Write uploaded file content
-            temp_file.write(uploaded_file.getbuffer())
-            temp_file.close()
-            
-            return temp_file.name
         except Exception as e:
             raise Exception(f"Error saving uploaded file: {str(e)}")
+        
+        try:
+            # Copy uploaded file content in fixed-size chunks to keep peak memory flat
+            try:
+                uploaded_file.seek(0)
+                with os.fdopen(fd, 'wb') as temp_file:
+                    shutil.copyfileobj(uploaded_file, temp_file, length=config.UPLOAD_CHUNK_SIZE)
+            except Exception as e:
+                raise Exception(f"Error saving uploaded file: {str(e)}")
+            
+            yield temp_file_path
+        finally:
+            # Removed however the block exits, so failed parses cannot leak temp files
+            FileProcessor.cleanup_temp_file(temp_file_path)
     
     @staticmethod
     def cleanup_temp_file(file_path: str):
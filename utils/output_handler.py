@@ -1,10 +1,69 @@
+import io
 import os
-import json
+import time
+import uuid
+from itertools import islice
+import orjson
 import pandas as pd
-from typing import List, Dict, Any
+import xlsxwriter
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 import config
 
+# Schema of an error row; every field but the error details stays empty
+_EMPTY_ROW = dict.fromkeys([
+    "file_name", "status", "error_message", "name", "email", "phone", "university", "course",
+    "cgpa_percentage", "technical_skills", "ai_ml_experience", "gen_ai_experience",
+    "overall_experience", "certifications", "projects", "processing_timestamp"
+], "")
+
+def _flatten_error(result: Dict[str, Any], timestamp: str) -> Dict[str, Any]:
+    """Flatten a failed analysis into an Excel row"""
+    row = _EMPTY_ROW.copy()
+    row["file_name"] = result.get("file_name", "Unknown")
+    row["status"] = "Error"
+    row["error_message"] = result["error"]
+    row["processing_timestamp"] = timestamp
+    return row
+
+def _flatten_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a successful analysis into an Excel row with one lookup per field"""
+    # "or {}" / "or ()" also cover sections the model returned as null and share one empty default
+    contact_details = result.get("contact_details") or {}
+    education = result.get("education") or {}
+    skills = result.get("skills") or {}
+    experience_scores = result.get("experience_scores") or {}
+    supporting_info = result.get("supporting_information") or {}
+    metadata = result.get("analysis_metadata") or {}
+    
+    return {
+        "file_name": metadata.get("file_name", ""),
+        "status": "Success",
+        "error_message": "",
+        "name": result.get("name", ""),
+        "email": contact_details.get("email", ""),
+        "phone": contact_details.get("phone", ""),
+        "location": contact_details.get("location", ""),
+        "university": education.get("university", ""),
+        "year_of_study": education.get("year_of_study", ""),
+        "course": education.get("course", ""),
+        "discipline": education.get("discipline", ""),
+        "cgpa_percentage": education.get("cgpa_percentage", ""),
+        "technical_skills": ", ".join(skills.get("technical_skills") or ()),
+        "soft_skills": ", ".join(skills.get("soft_skills") or ()),
+        "programming_languages": ", ".join(skills.get("programming_languages") or ()),
+        "tools_technologies": ", ".join(skills.get("tools_technologies") or ()),
+        "ai_ml_experience": experience_scores.get("ai_ml_experience", ""),
+        "gen_ai_experience": experience_scores.get("gen_ai_experience", ""),
+        "overall_experience": experience_scores.get("overall_experience", ""),
+        "certifications": ", ".join(supporting_info.get("certifications") or ()),
+        "internships": ", ".join(supporting_info.get("internships") or ()),
+        "projects": ", ".join(supporting_info.get("projects") or ()),
+        "achievements": ", ".join(supporting_info.get("achievements") or ()),
+        "confidence_score": metadata.get("confidence_score", ""),
+        "processing_timestamp": metadata.get("processing_timestamp", "")
+    }
+
 class OutputHandler:
     """Handles output generation and file management for resume analysis results"""
     
@@ -13,138 +72,107 @@ class OutputHandler:
         self.output_dir = config.OUTPUT_DIR
         os.makedirs(self.output_dir, exist_ok=True)
     
+    def new_results_path(self) -> str:
+        """Return a fresh JSON Lines path for streaming one batch's results"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.output_dir, f"resume_analysis_{timestamp}_{uuid.uuid4().hex[:8]}.jsonl")
+    
+    @staticmethod
+    def remove_results(results_path: str):
+        """Delete a results file once it is no longer shown"""
+        try:
+            if os.path.exists(results_path):
+                os.remove(results_path)
+        except Exception as e:
+            print(f"Could not remove results file {results_path}: {e}")
+    
+    @staticmethod
+    def load_results(results_path: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Read full analysis results back from a JSON Lines file, optionally only the first limit"""
+        with open(results_path, 'rb') as f:
+            return [orjson.loads(line) for line in islice((line for line in f if line.strip()), limit)]
+    
     def flatten_resume_data(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Flatten nested resume data for Excel export"""
-        flattened_data = []
+        # Rows from one export share its generation timestamp
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        for result in results:
-            if "error" in result:
-                # Handle error cases
-                flattened_data.append({
-                    "file_name": result.get("file_name", "Unknown"),
-                    "status": "Error",
-                    "error_message": result["error"],
-                    "name": "",
-                    "email": "",
-                    "phone": "",
-                    "university": "",
-                    "course": "",
-                    "cgpa_percentage": "",
-                    "technical_skills": "",
-                    "ai_ml_experience": "",
-                    "gen_ai_experience": "",
-                    "overall_experience": "",
-                    "certifications": "",
-                    "projects": "",
-                    "processing_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-                continue
-            
-            # Extract basic information
-            name = result.get("name", "")
-            contact_details = result.get("contact_details", {})
-            education = result.get("education", {})
-            skills = result.get("skills", {})
-            experience_scores = result.get("experience_scores", {})
-            supporting_info = result.get("supporting_information", {})
-            metadata = result.get("analysis_metadata", {})
-            
-            # Flatten the data
-            flattened_row = {
-                "file_name": metadata.get("file_name", ""),
-                "status": "Success",
-                "error_message": "",
-                "name": name,
-                "email": contact_details.get("email", ""),
-                "phone": contact_details.get("phone", ""),
-                "location": contact_details.get("location", ""),
-                "university": education.get("university", ""),
-                "year_of_study": education.get("year_of_study", ""),
-                "course": education.get("course", ""),
-                "discipline": education.get("discipline", ""),
-                "cgpa_percentage": education.get("cgpa_percentage", ""),
-                "technical_skills": ", ".join(skills.get("technical_skills", [])),
-                "soft_skills": ", ".join(skills.get("soft_skills", [])),
-                "programming_languages": ", ".join(skills.get("programming_languages", [])),
-                "tools_technologies": ", ".join(skills.get("tools_technologies", [])),
-                "ai_ml_experience": experience_scores.get("ai_ml_experience", ""),
-                "gen_ai_experience": experience_scores.get("gen_ai_experience", ""),
-                "overall_experience": experience_scores.get("overall_experience", ""),
-                "certifications": ", ".join(supporting_info.get("certifications", [])),
-                "internships": ", ".join(supporting_info.get("internships", [])),
-                "projects": ", ".join(supporting_info.get("projects", [])),
-                "achievements": ", ".join(supporting_info.get("achievements", [])),
-                "confidence_score": metadata.get("confidence_score", ""),
-                "processing_timestamp": metadata.get("processing_timestamp", "")
-            }
-            
-            flattened_data.append(flattened_row)
-        
-        return flattened_data
+        return [
+            _flatten_error(result, timestamp) if "error" in result else _flatten_result(result)
+            for result in results
+        ]
     
-    def save_to_excel(self, results: List[Dict[str, Any]], filename: str = None) -> str:
-        """Save results to Excel file"""
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"resume_analysis_{timestamp}.xlsx"
-        
-        filepath = os.path.join(self.output_dir, filename)
-        
+    @staticmethod
+    def _column_widths(df: pd.DataFrame, max_width: int = 50) -> List[int]:
+        """Fit each column to its longest value or header, computed with vectorized pandas ops"""
+        header_lengths = pd.Series(df.columns.str.len(), index=df.columns)
+        value_lengths = df.astype(str).map(len).max() if len(df) else header_lengths
+        lengths = pd.concat([header_lengths, value_lengths], axis=1).max(axis=1)
+        return [int(width) for width in (lengths + 2).clip(upper=max_width)]
+    
+    def build_excel_bytes(self, results: List[Dict[str, Any]]) -> bytes:
+        """Build the Excel report in memory and return its bytes"""
         # Flatten data for Excel
         flattened_data = self.flatten_resume_data(results)
         
         # Create DataFrame
         df = pd.DataFrame(flattened_data)
         
-        # Save to Excel with formatting
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Resume Analysis', index=False)
-            
-            # Auto-adjust column widths
-            worksheet = writer.sheets['Resume Analysis']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        # constant_memory flushes each row as soon as the next one starts, so rows are written
+        # in order with the workbook API (to_excel writes column by column) and column widths
+        # are set before any data; strings_to_urls is off so links in text stay plain strings as before
+        buffer = io.BytesIO()
+        workbook = xlsxwriter.Workbook(buffer, {'constant_memory': True, 'strings_to_urls': False})
+        worksheet = workbook.add_worksheet('Resume Analysis')
         
-        return filepath
-    
-    def save_to_json(self, results: List[Dict[str, Any]], filename: str = None) -> str:
-        """Save results to JSON file"""
-        if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"resume_analysis_{timestamp}.json"
+        # Auto-adjust column widths
+        for index, width in enumerate(self._column_widths(df)):
+            worksheet.set_column(index, index, width)
         
-        filepath = os.path.join(self.output_dir, filename)
+        columns = list(df.columns)
+        worksheet.write_row(0, 0, columns, workbook.add_format({'bold': True, 'border': 1}))
+        for row_index, row in enumerate(flattened_data, start=1):
+            worksheet.write_row(row_index, 0, [row.get(column, "") for column in columns])
         
+        workbook.close()
+        return buffer.getvalue()
+    
+    def build_json_bytes(self, results: List[Dict[str, Any]]) -> bytes:
+        """Build the JSON report in memory and return its bytes"""
         # Add metadata to results
-        output_data = {
-            "metadata": {
-                "total_resumes": len(results),
-                "successful_analyses": len([r for r in results if "error" not in r]),
-                "failed_analyses": len([r for r in results if "error" in r]),
-                "generated_at": datetime.now().isoformat(),
-                "version": "1.0"
-            },
-            "results": results
+        failed_count = sum(1 for result in results if "error" in result)
+        metadata = {
+            "total_resumes": len(results),
+            "successful_analyses": len(results) - failed_count,
+            "failed_analyses": failed_count,
+            "generated_at": datetime.now().isoformat(),
+            "version": "1.0"
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        # Serialize {"metadata": ..., "results": [...]} one result at a time with orjson
+        options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        buffer = io.BytesIO()
+        buffer.write(b'{\n"metadata": ' + orjson.dumps(metadata, option=options) + b',\n"results": [\n')
+        for index, result in enumerate(results):
+            if index:
+                buffer.write(b',\n')
+            buffer.write(orjson.dumps(result, option=options))
+        buffer.write(b'\n]\n}\n')
         
-        return filepath
+        return buffer.getvalue()
     
-    def generate_summary_stats(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate summary statistics from analysis results"""
-        successful_results = [r for r in results if "error" not in r]
-        failed_results = [r for r in results if "error" in r]
+    @staticmethod
+    def partition_results(results: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split results into (successful, failed) in a single pass"""
+        successful_results, failed_results = [], []
+        for result in results:
+            (failed_results if "error" in result else successful_results).append(result)
+        return successful_results, failed_results
+    
+    def generate_summary_stats(self, results: List[Dict[str, Any]],
+                               partitioned: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Generate summary statistics from analysis results, reusing a partition_results split if given"""
+        successful_results, failed_results = partitioned or self.partition_results(results)
         
         stats = {
             "total_files": len(results),
@@ -154,47 +182,29 @@ class OutputHandler:
         }
         
         if successful_results:
-            # Calculate average experience scores
-            ai_scores = []
-            gen_ai_scores = []
-            overall_scores = []
-            
-            for result in successful_results:
-                experience_scores = result.get("experience_scores", {})
-                if experience_scores.get("ai_ml_experience"):
-                    try:
-                        ai_scores.append(float(experience_scores["ai_ml_experience"]))
-                    except:
-                        pass
-                if experience_scores.get("gen_ai_experience"):
-                    try:
-                        gen_ai_scores.append(float(experience_scores["gen_ai_experience"]))
-                    except:
-                        pass
-                if experience_scores.get("overall_experience"):
-                    try:
-                        overall_scores.append(float(experience_scores["overall_experience"]))
-                    except:
-                        pass
+            # Calculate average experience scores in one vectorized pass; missing, zero
+            # and non-numeric scores are ignored
+            scores = pd.DataFrame([r.get("experience_scores") or {} for r in successful_results])
             
-            stats.update({
-                "avg_ai_ml_experience": sum(ai_scores) / len(ai_scores) if ai_scores else 0,
-                "avg_gen_ai_experience": sum(gen_ai_scores) / len(gen_ai_scores) if gen_ai_scores else 0,
-                "avg_overall_experience": sum(overall_scores) / len(overall_scores) if overall_scores else 0
-            })
+            for field in ("ai_ml_experience", "gen_ai_experience", "overall_experience"):
+                if field in scores.columns:
+                    values = pd.to_numeric(scores[field], errors="coerce")
+                    average = values.mask(values == 0).mean()
+                else:
+                    average = float("nan")
+                stats[f"avg_{field}"] = 0 if pd.isna(average) else float(average)
         
         return stats
     
     def cleanup_old_files(self, max_age_hours: int = 24):
         """Clean up old output files"""
-        current_time = datetime.now()
+        cutoff = time.time() - max_age_hours * 3600
         
-        for filename in os.listdir(self.output_dir):
-            filepath = os.path.join(self.output_dir, filename)
-            if os.path.isfile(filepath):
-                file_age = current_time - datetime.fromtimestamp(os.path.getctime(filepath))
-                if file_age.total_seconds() > max_age_hours * 3600:
+        # scandir entries cache file type and stat results from the directory read
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.stat().st_ctime < cutoff:
                     try:
-                        os.remove(filepath)
+                        os.remove(entry.path)
                     except Exception as e:
-                        print(f"Could not remove old file {filepath}: {e}") 
\ No newline at end of file
+                        print(f"Could not remove old file {entry.path}: {e}") 
\ No newline at end of file
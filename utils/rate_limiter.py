@@ -0,0 +1,70 @@
+import asyncio
+from collections import deque
+
+class AsyncRateLimiter:
+    """Enforces a minimum interval between API requests across concurrent workers"""
+    
+    def __init__(self, min_interval: float):
+        """Initialize the limiter with the minimum spacing between requests in seconds"""
+        self.min_interval = max(0.0, min_interval)
+        self.last_ts = float("-inf")
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until the next request slot is available"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            sleep_for = max(0.0, self.last_ts + self.min_interval - loop.time())
+            if sleep_for > 0:
+                await asyncio.sleep(sleep_for)
+            self.last_ts = loop.time()
+
+class AdaptiveSemaphore:
+    """Concurrency limiter that tunes its limit with AIMD feedback from request latencies"""
+    
+    def __init__(self, min_limit: int, max_limit: int, target_latency: float, window: int = 32):
+        """Initialize the limiter at its maximum concurrency; it only backs off under pressure"""
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_latency = target_latency
+        self.current = float(self.max_limit)
+        self._latencies = deque(maxlen=window)
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+    
+    @property
+    def limit(self) -> int:
+        """Number of requests currently allowed in flight"""
+        return int(self.current)
+    
+    async def acquire(self):
+        """Wait for a free slot under the current limit"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+    
+    async def release(self):
+        """Free a slot; slots above a lowered limit are absorbed rather than handed out"""
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+    
+    async def record(self, latency: float, success: bool):
+        """Feed back a request outcome: additive increase when healthy, multiplicative decrease otherwise"""
+        async with self._condition:
+            self._latencies.append(latency)
+            mean_latency = sum(self._latencies) / len(self._latencies)
+            
+            if success and mean_latency <= self.target_latency:
+                self.current = min(self.max_limit, self.current + 0.5)
+            else:
+                self.current = max(self.min_limit, self.current * 0.5)
+            
+            self._condition.notify_all()
+    
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
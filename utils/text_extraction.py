@@ -0,0 +1,58 @@
+import io
+import os
+from itertools import chain
+
+# Kept free of Streamlit and other heavy imports: these functions run in the extraction
+# process pool, and each worker imports this module before parsing its first file
+
+def extract_pdf_text(source) -> str:
+    """Extract text from a PDF path or bytes with pypdfium2, falling back to pdfminer if it is unavailable"""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        from pdfminer.high_level import extract_text
+        return extract_text(io.BytesIO(source) if isinstance(source, bytes) else source)
+    
+    pdf = pdfium.PdfDocument(source)
+    try:
+        pages = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return '\n'.join(pages)
+    finally:
+        pdf.close()
+
+def docx_text(doc) -> str:
+    """Join a DOCX document's paragraphs and then its table rows (cells tab-separated) in one pass"""
+    table_rows = (
+        '\t'.join(cell.text for cell in row.cells)
+        for table in doc.tables
+        for row in table.rows
+    )
+    return '\n'.join(chain((paragraph.text for paragraph in doc.paragraphs), table_rows))
+
+def extract_text_from_bytes(data: bytes, file_extension: str) -> str:
+    """Extract text from PDF or DOCX bytes"""
+    if file_extension == '.pdf':
+        return extract_pdf_text(data)
+    elif file_extension == '.docx':
+        from docx import Document
+        doc = Document(io.BytesIO(data))
+        return docx_text(doc)
+    else:
+        raise ValueError(f"Unsupported file format: {file_extension}")
+
+def extract_text_from_path(file_path: str) -> str:
+    """Extract text from a PDF or DOCX file on disk"""
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == '.pdf':
+        return extract_pdf_text(file_path)
+    elif file_extension == '.docx':
+        from docx import Document
+        doc = Document(file_path)
+        return docx_text(doc)
+    else:
+        raise ValueError(f"Unsupported file format: {file_extension}")
\ No newline at end of file